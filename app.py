@@ -1,71 +1,217 @@
 
+import gc
+import io
 import streamlit as st
 import pandas as pd
 import numpy as np
 from pandas.errors import EmptyDataError
-from utils import haversine
-import optimization as opt
-from optimization import optimize
+from utils import EARTH_RADIUS_MI, haversine_matrix
+from optimization import optimize, ROAD_FACTOR
 from visualization import plot_network, summary
 
 st.set_page_config(page_title="Warehouse Network Optimizer", layout="wide")
 
-ROAD_FACTOR = opt.ROAD_FACTOR
+DEMAND_COLS = ["Longitude", "Latitude", "DemandLbs"]
+
+# DataFrame churn trips the default 700-allocation gen‑0 threshold constantly;
+# collect less often rather than disabling gc in a long‑lived server process.
+gc.set_threshold(7000, 10, 10)
+
+# ───────────────────── Cached file loaders ─────────────────────────────
+@st.cache_data(show_spinner=False)
+def _load_demand(file_bytes):
+    """Parse demand CSV bytes; cached on content so reruns skip the parse."""
+    df = pd.read_csv(io.BytesIO(file_bytes), engine="c",
+                     dtype={c: "float64" for c in DEMAND_COLS})
+    return df.dropna(subset=DEMAND_COLS)
+
+@st.cache_data(show_spinner=False)
+def _load_candidates(file_bytes):
+    """Parse headerless candidate CSV bytes (lon,lat[,cost/sqft]).
+
+    Returns (sites, costs): [lon, lat] lists and, when a cost column is
+    present, a {(lon, lat) rounded to 6 dp: cost/sqft} dict, else None.
+    """
+    cf = pd.read_csv(io.BytesIO(file_bytes), header=None, engine="c")
+    cf = cf.dropna(subset=[0, 1])
+    sites = cf.iloc[:, :2].to_numpy().tolist()
+    costs = None
+    if cf.shape[1] >= 3:
+        # Python round() to match the lookup key built in optimize()
+        costs = {(round(lon, 6), round(lat, 6)): c
+                 for lon, lat, c in cf.iloc[:, :3].to_numpy().tolist()}
+    return sites, costs
+
+# ───────────────────── Cached solver run ───────────────────────────────
+def _as_tuples(pts):
+    """Freeze a list of coordinate lists so it can key the solver cache."""
+    return tuple(tuple(p) for p in pts)
+
+# Largest store × site matrix worth sharing: 25M float64 cells ≈ 200 MB each.
+# Bigger problems skip the cache and _greedy computes distances block by block.
+MAX_SHARED_SITE_CELLS = 25_000_000
+SITE_DIST_BLOCK_CELLS = 250_000  # cells per row block while filling (~2 MB)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _site_dists(demand_bytes, sites):
+    """Store × candidate road-mile matrix, shared across sessions and scenarios.
+
+    Filled in row blocks so peak memory stays near the matrix itself. Read-only
+    because every session gets the same array. At most two are kept, each
+    capped at MAX_SHARED_SITE_CELLS by the caller.
+    """
+    df = _load_demand(demand_bytes)
+    lon = df["Longitude"].to_numpy()
+    lat = df["Latitude"].to_numpy()
+    sites = np.asarray(sites, dtype=np.float64)
+    d = np.empty((len(df), len(sites)))
+    step = max(1, SITE_DIST_BLOCK_CELLS // len(sites))
+    for i in range(0, len(df), step):
+        rows = slice(i, i + step)
+        d[rows] = haversine_matrix(lon[rows], lat[rows], sites[:, 0], sites[:, 1])
+    d *= ROAD_FACTOR
+    d.flags.writeable = False
+    return d
+
+# Each entry holds a full assigned DataFrame, so keep only recent solves
+@st.cache_data(show_spinner="Optimizing…", max_entries=16)
+def _run_opt(demand_bytes, k_vals, rate_out, sqft_per_lb, cost_sqft, fixed_cost,
+             consider_inbound, inbound_rate_mile, inbound_pts, fixed_centers,
+             transfer_rate_mile, candidate_sites, restrict_cand, candidate_costs):
+    """Run optimize(); cached on every input so unchanged reruns are instant."""
+    df = _load_demand(demand_bytes)
+    site_dists = None
+    # Only worth building when some k actually reaches the greedy selector
+    greedy = candidate_sites and any(
+        len(candidate_sites) >= max(k, len(fixed_centers)) for k in k_vals)
+    if greedy and len(df)*len(candidate_sites) <= MAX_SHARED_SITE_CELLS:
+        site_dists = _site_dists(demand_bytes, candidate_sites)
+    res = optimize(
+        df=df,
+        k_vals=list(k_vals),
+        rate_out=rate_out,
+        sqft_per_lb=sqft_per_lb,
+        cost_sqft=cost_sqft,
+        fixed_cost=fixed_cost,
+        consider_inbound=consider_inbound,
+        inbound_rate_mile=inbound_rate_mile,
+        inbound_pts=[list(p) for p in inbound_pts],
+        fixed_centers=[list(c) for c in fixed_centers],
+        rdc_list=[],  # keep simple
+        transfer_rate_mile=transfer_rate_mile,
+        rdc_sqft_per_lb=sqft_per_lb,
+        rdc_cost_per_sqft=cost_sqft,
+        candidate_sites=([list(c) for c in candidate_sites]
+                         if candidate_sites else None),
+        restrict_cand=restrict_cand,
+        candidate_costs=candidate_costs,
+        site_dists=site_dists,
+    )
+    gc.collect()  # reclaim solver temporaries once per real solve
+    return res
 
 # ───────────────────── Helper for lane export ──────────────────────────
+def _center_trig(centers):
+    """Radians and cos(lat) of warehouse centers, computed once per export."""
+    wlon_r = np.radians(centers[:, 0])
+    wlat_r = np.radians(centers[:, 1])
+    return wlon_r, wlat_r, np.cos(wlat_r)
+
+def _hav_to_centers(olon, olat, trig):
+    """Road miles from each origin (rows) to each warehouse (cols)."""
+    wlon_r, wlat_r, wcos = trig
+    olat_r = np.radians(olat)[:, None]
+    dlon = np.radians(olon)[:, None] - wlon_r
+    a = (np.sin((olat_r - wlat_r) / 2.0)**2
+         + np.cos(olat_r) * wcos * np.sin(dlon / 2.0)**2)
+    return 2.0 * EARTH_RADIUS_MI * np.arcsin(np.sqrt(a)) * ROAD_FACTOR
+
+LANE_TYPES = ["outbound", "inbound", "transfer"]
+# Coordinates and miles fit float32; weights and dollars keep float64 precision
+LANE_COLS = {"origin_lon": np.float32, "origin_lat": np.float32,
+             "dest_lon": np.float32, "dest_lat": np.float32,
+             "distance_mi": np.float32, "weight_lbs": np.float64,
+             "rate": np.float64, "cost": np.float64}
+
+def _fill_lanes(cols, sl, olon, olat, dlon, dlat, dist, wt, rate):
+    """Write one lane block into the preallocated column arrays."""
+    cols["origin_lon"][sl] = olon
+    cols["origin_lat"][sl] = olat
+    cols["dest_lon"][sl] = dlon
+    cols["dest_lat"][sl] = dlat
+    cols["distance_mi"][sl] = dist
+    cols["weight_lbs"][sl] = wt
+    cols["rate"][sl] = rate
+    cols["cost"][sl] = wt * dist * rate
+
 def build_lane_df(res, scn):
     """Return DataFrame of outbound, inbound, and transfer lanes."""
-    lanes = []
+    centers = np.asarray(res["centers"], dtype=np.float64)
+    wh_dem = np.asarray(res["demand_per_wh"], dtype=np.float64)
+    trig = _center_trig(centers)
+    k = len(centers)
+    a = res["assigned"]
 
-    # Outbound
-    for r in res["assigned"].itertuples():
-        wlon, wlat = res["centers"][int(r.Warehouse)]
-        cost = r.DemandLbs * r.DistMi * scn["rate_out"]
-        lanes.append(dict(
-            lane_type="outbound",
-            origin_lon=wlon, origin_lat=wlat,
-            dest_lon=r.Longitude, dest_lat=r.Latitude,
-            distance_mi=r.DistMi,
-            weight_lbs=r.DemandLbs,
-            rate=scn["rate_out"],
-            cost=cost
-        ))
-
-    # Inbound
+    # Origins fanning out to every warehouse: (lane_type, coords, shares, rate)
+    fan = []
     if scn.get("inbound_on") and scn.get("inbound_pts"):
-        for slon, slat, pct in scn["inbound_pts"]:
-            for (wlon, wlat), wh_dem in zip(res["centers"], res["demand_per_wh"]):
-                dist = haversine(slon, slat, wlon, wlat) * ROAD_FACTOR
-                wt = wh_dem * pct
-                lanes.append(dict(
-                    lane_type="inbound",
-                    origin_lon=slon, origin_lat=slat,
-                    dest_lon=wlon, dest_lat=wlat,
-                    distance_mi=dist,
-                    weight_lbs=wt,
-                    rate=scn["in_rate"],
-                    cost=wt * dist * scn["in_rate"]
-                ))
-
-    # Transfers (RDC ➜ WH)
+        sup = np.asarray(scn["inbound_pts"], dtype=np.float64)
+        fan.append(("inbound", sup[:, :2], sup[:, 2], scn["in_rate"]))
     rdc_only = [r for r in res.get("rdc_list", []) if not r["is_sdc"]]
     if rdc_only:
-        share = 1.0 / len(rdc_only)
-        for rdc in rdc_only:
-            rx, ry = rdc["coords"]
-            for (wlon, wlat), wh_dem in zip(res["centers"], res["demand_per_wh"]):
-                dist = haversine(rx, ry, wlon, wlat) * ROAD_FACTOR
-                wt = wh_dem * share
-                lanes.append(dict(
-                    lane_type="transfer",
-                    origin_lon=rx, origin_lat=ry,
-                    dest_lon=wlon, dest_lat=wlat,
-                    distance_mi=dist,
-                    weight_lbs=wt,
-                    rate=scn["trans_rate"],
-                    cost=wt * dist * scn["trans_rate"]
-                ))
-    return pd.DataFrame(lanes)
+        rdc = np.asarray([r["coords"] for r in rdc_only], dtype=np.float64)
+        fan.append(("transfer", rdc, np.full(len(rdc), 1.0 / len(rdc)),
+                    scn["trans_rate"]))
+
+    n_out = len(a)
+    total = n_out + k * sum(len(origins) for _, origins, _, _ in fan)
+    cols = {c: np.empty(total, dtype=dt) for c, dt in LANE_COLS.items()}
+    lane_code = np.empty(total, dtype=np.int8)
+
+    # Outbound
+    wh_idx = a["Warehouse"].to_numpy().astype(int)
+    sl = slice(0, n_out)
+    lane_code[sl] = LANE_TYPES.index("outbound")
+    _fill_lanes(cols, sl, centers[wh_idx, 0], centers[wh_idx, 1],
+                a["Longitude"].to_numpy(), a["Latitude"].to_numpy(),
+                a["DistMi"].to_numpy(), a["DemandLbs"].to_numpy(),
+                scn["rate_out"])
+
+    # Inbound and transfers (RDC ➜ WH)
+    pos = n_out
+    for typ, origins, shares, rate in fan:
+        dist = _hav_to_centers(origins[:, 0], origins[:, 1], trig)
+        wt = wh_dem[None, :] * shares[:, None]
+        sl = slice(pos, pos + dist.size)
+        lane_code[sl] = LANE_TYPES.index(typ)
+        _fill_lanes(cols, sl,
+                    np.repeat(origins[:, 0], k), np.repeat(origins[:, 1], k),
+                    np.tile(centers[:, 0], len(origins)),
+                    np.tile(centers[:, 1], len(origins)),
+                    dist.ravel(), wt.ravel(), rate)
+        pos = sl.stop
+    lane_type = pd.Categorical.from_codes(lane_code, categories=LANE_TYPES)
+    return pd.DataFrame({"lane_type": lane_type, **cols})
+
+def _lanes_csv(lane_df):
+    """Encode lanes as UTF‑8 CSV straight into a byte buffer."""
+    buf = io.BytesIO()
+    lane_df.to_csv(buf, index=False, encoding="utf-8", lineterminator="\n")
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _lane_export(run_args, _res):
+    """Build and encode lanes at most once per solver run.
+
+    Keyed on the exact _run_opt arguments that produced _res (which is not
+    hashed itself), so a cached CSV always matches its own solve.
+    """
+    scn = dict(rate_out=run_args["rate_out"],
+               in_rate=run_args["inbound_rate_mile"],
+               trans_rate=run_args["transfer_rate_mile"],
+               inbound_on=run_args["consider_inbound"],
+               inbound_pts=[list(p) for p in run_args["inbound_pts"]])
+    return _lanes_csv(build_lane_df(_res, scn))
 
 # ───────────────────── Session init ─────────────────────────────
 if "scenarios" not in st.session_state:
@@ -76,6 +222,30 @@ def _num_input(scn, key, label, default, fmt="%.4f", **kw):
     scn[key] = st.number_input(label, value=scn[key], format=fmt,
                                key=f"{key}_{scn['_name']}", **kw)
 
+def _parse_pts(txt, ncols):
+    """Parse "lon,lat[,pct]" lines into an (n, ncols) array; bad lines are skipped.
+
+    Each line is split on its own, so a malformed line never sets the column
+    count for the rest; only lines with exactly ncols numeric fields are kept.
+    """
+    fields = pd.Series(txt.splitlines(), dtype=object).str.split(",", expand=True)
+    if fields.shape[1] < ncols:
+        return np.empty((0, ncols))
+    vals = fields.iloc[:, :ncols].apply(
+        lambda c: pd.to_numeric(c.str.strip(), errors="coerce"))
+    ok = fields.notna().sum(axis=1).eq(ncols) & vals.notna().all(axis=1)
+    return vals.loc[ok].to_numpy(dtype=np.float64)
+
+@st.cache_data(show_spinner=False)
+def _parse_fixed(txt):
+    """Fixed warehouses as [lon, lat] lists, cached on the raw text."""
+    return _parse_pts(txt, 2).tolist()
+
+@st.cache_data(show_spinner=False)
+def _parse_sup(txt):
+    """Supply points as [lon, lat, share] lists, cached on the raw text."""
+    return (_parse_pts(txt, 3) * [1.0, 1.0, 0.01]).tolist()
+
 # ───────────────────── Sidebar builder ─────────────────────────
 def sidebar(scn):
     name = scn["_name"]
@@ -87,88 +257,113 @@ def sidebar(scn):
             up = st.file_uploader("Demand CSV (Longitude, Latitude, DemandLbs)",
                                   key=f"dem_{name}")
             if up:
-                scn["demand_file"] = up
-            if "demand_file" not in scn:
+                scn["demand_bytes"] = up.getvalue()
+            if "demand_bytes" not in scn:
                 st.info("Upload a demand file to continue.")
                 return False
 
             if st.checkbox("Preview demand", key=f"pre_{name}"):
-                st.dataframe(pd.read_csv(scn["demand_file"]).head())
+                st.dataframe(_load_demand(scn["demand_bytes"]).head())
 
             cand_up = st.file_uploader("Candidate WH CSV (lon,lat[,cost/sqft])",
                                        key=f"cand_{name}")
             if cand_up is not None:
                 if cand_up:
-                    scn["cand_file"] = cand_up
+                    scn["cand_bytes"] = cand_up.getvalue()
                 else:
-                    scn.pop("cand_file", None)
+                    scn.pop("cand_bytes", None)
             scn["restrict_cand"] = st.checkbox("Restrict to candidates",
                                                value=scn.get("restrict_cand", False),
                                                key=f"rc_{name}")
 
-        # Cost
-        with st.expander("💰 Cost Parameters", False):
-            st.subheader("Transportation $ / lb‑mile")
-            _num_input(scn, "rate_out", "Outbound", 0.35)
-            _num_input(scn, "in_rate", "Inbound", 0.30)
-            _num_input(scn, "trans_rate", "Transfer", 0.32)
-
-            st.subheader("Warehouse")
-            _num_input(scn, "sqft_per_lb", "Sq ft per lb", 0.02)
-            _num_input(scn, "cost_sqft", "$/sq ft / yr", 6.0, "%.2f")
-            _num_input(scn, "fixed_wh_cost", "Fixed $", 250000.0, "%.0f",
-                       step=50000.0)
-
-        # k selection
-        with st.expander("🔢 Warehouse Count", False):
+        # These toggles reveal other inputs, so they stay outside the form
+        # where changing them reruns immediately
+        with st.expander("🔀 Options", True):
             scn["auto_k"] = st.checkbox("Optimize k", value=scn.get("auto_k", True),
                                         key=f"ak_{name}")
-            if scn["auto_k"]:
-                scn["k_rng"] = st.slider("k range", 1, 15, scn.get("k_rng", (3, 6)),
-                                         key=f"kr_{name}")
-            else:
-                _num_input(scn, "k_fixed", "k", 4, "%.0f", min_value=1, max_value=15)
-
-        # Fixed and inbound
-        with st.expander("📍 Locations", False):
-            st.subheader("Fixed Warehouses")
-            fixed_txt = st.text_area("lon,lat per line", value=scn.get("fixed_txt", ""),
-                                     key=f"fx_{name}", height=80)
-            scn["fixed_txt"] = fixed_txt
-            fixed_centers = []
-            for ln in fixed_txt.splitlines():
-                try:
-                    lon, lat = map(float, ln.split(","))
-                    fixed_centers.append([lon, lat])
-                except Exception:
-                    continue
-            scn["fixed_centers"] = fixed_centers
-
-            st.subheader("Inbound supply points")
             scn["inbound_on"] = st.checkbox("Enable inbound",
                                             value=scn.get("inbound_on", False),
                                             key=f"inb_{name}")
-            inbound_pts = []
-            if scn["inbound_on"]:
-                sup_txt = st.text_area("lon,lat,percent (0‑100) per line",
-                                       value=scn.get("sup_txt", ""),
-                                       key=f"sup_{name}", height=100)
-                scn["sup_txt"] = sup_txt
-                for ln in sup_txt.splitlines():
-                    try:
-                        lon, lat, pct = map(float, ln.split(","))
-                        inbound_pts.append([lon, lat, pct/100.0])
-                    except Exception:
-                        continue
-            scn["inbound_pts"] = inbound_pts
+
+        # Parameters are batched in a form so edits only rerun on Apply or Run
+        with st.form(f"form_{name}", border=False):
+            # Cost
+            with st.expander("💰 Cost Parameters", False):
+                st.subheader("Transportation $ / lb‑mile")
+                _num_input(scn, "rate_out", "Outbound", 0.35)
+                _num_input(scn, "in_rate", "Inbound", 0.30)
+                _num_input(scn, "trans_rate", "Transfer", 0.32)
+
+                st.subheader("Warehouse")
+                _num_input(scn, "sqft_per_lb", "Sq ft per lb", 0.02)
+                _num_input(scn, "cost_sqft", "$/sq ft / yr", 6.0, "%.2f")
+                _num_input(scn, "fixed_wh_cost", "Fixed $", 250000.0, "%.0f",
+                           step=50000.0)
+
+            # k selection
+            with st.expander("🔢 Warehouse Count", False):
+                if scn["auto_k"]:
+                    scn["k_rng"] = st.slider("k range", 1, 15, scn.get("k_rng", (3, 6)),
+                                             key=f"kr_{name}")
+                else:
+                    _num_input(scn, "k_fixed", "k", 4, "%.0f", min_value=1, max_value=15)
+
+            # Fixed and inbound
+            with st.expander("📍 Locations", False):
+                st.subheader("Fixed Warehouses")
+                fixed_txt = st.text_area("lon,lat per line", value=scn.get("fixed_txt", ""),
+                                         key=f"fx_{name}", height=80)
+                scn["fixed_txt"] = fixed_txt
+
+                if scn["inbound_on"]:
+                    st.subheader("Inbound supply points")
+                    sup_txt = st.text_area("lon,lat,percent (0‑100) per line",
+                                           value=scn.get("sup_txt", ""),
+                                           key=f"sup_{name}", height=100)
+                    scn["sup_txt"] = sup_txt
+
+            st.markdown("---")
+            c_apply, c_run = st.columns(2)
+            applied = c_apply.form_submit_button("Apply")
+            # Run submits the form too, so pending edits are solved, not dropped
+            run = c_run.form_submit_button("🚀 Run solver")
+        submitted = applied or run
+
+        # Re-parse locations only when the form is submitted
+        if submitted or "fixed_centers" not in scn:
+            scn["fixed_centers"] = _parse_fixed(scn["fixed_txt"])
+        if not scn["inbound_on"]:
+            scn["inbound_pts"] = []
+        elif submitted or not scn.get("inbound_pts"):
+            scn["inbound_pts"] = _parse_sup(scn.get("sup_txt", ""))
 
         # RDC/SDC omitted for brevity (keep same as previous) ...
 
-        st.markdown("---")
-        if st.button("🚀 Run solver", key=f"run_{name}"):
+        if run:
             st.session_state["run_target"] = name
     return True
 
+# ───────────────────── Results view ─────────────────────────────
+def _render_results(name):
+    """Map, cost summary and lane export for the last solver run of a scenario."""
+    run = st.session_state.get(f"res_{name}")
+    if run is None:
+        return
+    run_args, res = run
+    plot_network(res["assigned"], res["centers"])
+    summary(res["assigned"], res["total_cost"], res["out_cost"],
+            res["in_cost"], res["trans_cost"], res["wh_cost"],
+            res["centers"], res["demand_per_wh"],
+            run_args["sqft_per_lb"], False,
+            run_args["consider_inbound"], res["trans_cost"]>0)
+
+    # Export
+    st.download_button("📥 Download lane-level calculations (CSV)",
+                       _lane_export(run_args, res),
+                       file_name=f"{name}_lanes.csv",
+                       mime="text/csv", on_click="ignore",
+                       key=f"dl_{name}")
+
 # ───────────────────── Main area ───────────────────────────────
 tab_names = list(st.session_state["scenarios"].keys()) + ["➕ New scenario"]
 tabs = st.tabs(tab_names)
@@ -186,54 +381,37 @@ for i, tab in enumerate(tabs[:-1]):
                   if scn.get("auto_k", True) else [int(scn["k_fixed"])])
 
         if st.session_state.get("run_target") == name:
-            with st.spinner("Optimizing…"):
-                df = pd.read_csv(scn["demand_file"]).dropna(subset=["Longitude","Latitude","DemandLbs"])
-
-                candidate_sites = candidate_costs = None
-                if scn.get("cand_file"):
-                    try:
-                        cf = pd.read_csv(scn["cand_file"], header=None)
-                        cf = cf.dropna(subset=[0,1])
-                        if scn.get("restrict_cand"):
-                            candidate_sites = cf.iloc[:,:2].values.tolist()
-                        if cf.shape[1] >= 3:
-                            candidate_costs = { (round(r[0],6), round(r[1],6)): r[2]
-                                                for r in cf.itertuples(index=False)}
-                    except EmptyDataError:
-                        scn.pop("cand_file", None)
-
-                res = optimize(
-                    df=df,
-                    k_vals=k_vals,
-                    rate_out=scn["rate_out"],
-                    sqft_per_lb=scn["sqft_per_lb"],
-                    cost_sqft=scn["cost_sqft"],
-                    fixed_cost=scn["fixed_wh_cost"],
-                    consider_inbound=scn["inbound_on"],
-                    inbound_rate_mile=scn["in_rate"],
-                    inbound_pts=scn["inbound_pts"],
-                    fixed_centers=scn["fixed_centers"],
-                    rdc_list=[],  # keep simple
-                    transfer_rate_mile=scn["trans_rate"],
-                    rdc_sqft_per_lb=scn["sqft_per_lb"],
-                    rdc_cost_per_sqft=scn["cost_sqft"],
-                    candidate_sites=candidate_sites,
-                    restrict_cand=scn.get("restrict_cand", False),
-                    candidate_costs=candidate_costs,
-                )
-            plot_network(res["assigned"], res["centers"])
-            summary(res["assigned"], res["total_cost"], res["out_cost"],
-                    res["in_cost"], res["trans_cost"], res["wh_cost"],
-                    res["centers"], res["demand_per_wh"],
-                    scn["sqft_per_lb"], False,
-                    scn["inbound_on"], res["trans_cost"]>0)
-
-            # Export
-            lane_df = build_lane_df(res, scn)
-            st.download_button("📥 Download lane-level calculations (CSV)",
-                               lane_df.to_csv(index=False).encode("utf-8"),
-                               file_name=f"{name}_lanes.csv",
-                               mime="text/csv")
+            candidate_sites = candidate_costs = None
+            if scn.get("cand_bytes"):
+                try:
+                    sites, candidate_costs = _load_candidates(scn["cand_bytes"])
+                    if scn.get("restrict_cand"):
+                        candidate_sites = sites
+                except EmptyDataError:
+                    scn.pop("cand_bytes", None)
+
+            run_args = dict(
+                demand_bytes=scn["demand_bytes"],
+                k_vals=tuple(k_vals),
+                rate_out=scn["rate_out"],
+                sqft_per_lb=scn["sqft_per_lb"],
+                cost_sqft=scn["cost_sqft"],
+                fixed_cost=scn["fixed_wh_cost"],
+                consider_inbound=scn["inbound_on"],
+                inbound_rate_mile=scn["in_rate"],
+                inbound_pts=_as_tuples(scn["inbound_pts"]),
+                fixed_centers=_as_tuples(scn["fixed_centers"]),
+                transfer_rate_mile=scn["trans_rate"],
+                candidate_sites=(_as_tuples(candidate_sites)
+                                 if candidate_sites else None),
+                restrict_cand=scn.get("restrict_cand", False),
+                candidate_costs=candidate_costs,
+            )
+            # Keep the solved inputs with the result so later edits to the
+            # scenario never get mixed into its summary or lane export
+            st.session_state[f"res_{name}"] = (run_args, _run_opt(**run_args))
+
+        _render_results(name)
 
 # New scenario tab
 with tabs[-1]:
@@ -241,7 +419,4 @@ with tabs[-1]:
     if st.button("Create scenario"):
         if new_name and new_name not in st.session_state["scenarios"]:
             st.session_state["scenarios"][new_name] = {}
-            if hasattr(st, "rerun"):
-                st.rerun()
-            else:
-                st.experimental_rerun()
+            st.rerun()
@@ -1,14 +1,17 @@
 
 import numpy as np
 from sklearn.cluster import KMeans
-from utils import haversine, warehousing_cost
+from utils import haversine_matrix, warehousing_cost
 
 ROAD_FACTOR = 1.3  # inflate straight‑line distance to approximate road miles
 
+# Cap on store x site cells per on-demand distance block (~2 MB of float64)
+_BLOCK_CELLS = 250_000
+
 def _dist_matrix(lon, lat, centers):
-    d = np.empty((len(lon), len(centers)))
-    for j, (clon, clat) in enumerate(centers):
-        d[:,j] = haversine(lon, lat, clon, clat) * ROAD_FACTOR
+    c = np.asarray(centers, dtype=float)
+    d = haversine_matrix(lon, lat, c[:,0], c[:,1])
+    d *= ROAD_FACTOR
     return d
 
 def _assign(df, centers):
@@ -19,32 +22,43 @@ def _assign(df, centers):
     dmin = dmat[np.arange(len(df)), idx]
     return idx, dmin
 
-def _greedy(df, k, fixed, sites, rate_out):
+def _greedy(df, k, fixed, sites, rate_out, site_dists=None):
+    lon = df["Longitude"].values
+    lat = df["Latitude"].values
+    dem = df["DemandLbs"].values
+
+    def _cols(idx):
+        # Store distances to a block of sites: sliced from the shared matrix
+        # when given, else computed per block so memory stays bounded
+        if site_dists is not None:
+            return site_dists[:,idx]
+        return _dist_matrix(lon, lat, [sites[j] for j in idx])
+
+    block = max(1, _BLOCK_CELLS // max(len(df), 1))
     chosen = fixed.copy()
-    pool = [s for s in sites if s not in chosen]
+    dmin = (_dist_matrix(lon, lat, chosen).min(axis=1) if chosen
+            else np.full(len(df), np.inf))
+    pool = [j for j, s in enumerate(sites) if s not in chosen]
     while len(chosen)<k and pool:
-        best=None; best_cost=None
-        for cand in pool:
-            cost,_ ,_ = _outbound(df, chosen+[cand], rate_out)
-            if best_cost is None or cost<best_cost:
-                best,cost = cand,cost
-                best_cost=cost
-        chosen.append(best)
+        costs = []
+        for b in range(0, len(pool), block):
+            d = _cols(pool[b:b+block])
+            costs += [(dem*np.minimum(dmin, d[:,c])*rate_out).sum()
+                      for c in range(d.shape[1])]
+        best = pool[int(np.argmin(costs))]
+        chosen.append(sites[best])
+        dmin = np.minimum(dmin, _cols([best])[:,0])
         pool.remove(best)
     return chosen
 
-def _outbound(df, centers, rate_out):
-    idx,dmin = _assign(df, centers)
-    cost = (df["DemandLbs"]*dmin*rate_out).sum()
-    return cost, idx, dmin
-
 def optimize(
     df, k_vals, rate_out,
     sqft_per_lb, cost_sqft, fixed_cost,
     consider_inbound=False, inbound_rate_mile=0.0, inbound_pts=None,
     fixed_centers=None, rdc_list=None, transfer_rate_mile=0.0,
     rdc_sqft_per_lb=None, rdc_cost_per_sqft=None,
-    candidate_sites=None, restrict_cand=False, candidate_costs=None
+    candidate_sites=None, restrict_cand=False, candidate_costs=None,
+    site_dists=None
 ):
     inbound_pts = inbound_pts or []
     fixed_centers = fixed_centers or []
@@ -63,7 +77,7 @@ def optimize(
 
         # choose centers
         if candidate_sites and len(candidate_sites)>=k_eff:
-            centers = _greedy(df,k_eff,fixed_centers,candidate_sites,rate_out)
+            centers = _greedy(df,k_eff,fixed_centers,candidate_sites,rate_out,site_dists)
         else:
             km=KMeans(n_clusters=k_eff,n_init=10,random_state=42).fit(df[["Longitude","Latitude"]])
             centers=km.cluster_centers_.tolist()
@@ -86,19 +100,17 @@ def optimize(
 
         in_cost=0.0
         if consider_inbound and inbound_pts:
-            for lon,lat,pct in inbound_pts:
-                dists=np.array([haversine(lon,lat,cx,cy)*ROAD_FACTOR for cx,cy in centers])
-                in_cost+=(dists*np.array(demand_per_wh)*pct*inbound_rate_mile).sum()
+            sup=np.asarray(inbound_pts,dtype=float)
+            dists=_dist_matrix(sup[:,0],sup[:,1],centers)
+            in_cost=(dists*np.array(demand_per_wh)*sup[:,2,None]*inbound_rate_mile).sum()
 
         trans_cost=0.0
         rdc_only=[r for r in rdc_list if not r["is_sdc"]]
         if rdc_only:
-            wh_coords=centers
-            r_coords=[r["coords"] for r in rdc_only]
+            r_coords=np.asarray([r["coords"] for r in rdc_only],dtype=float)
             share=1.0/len(r_coords)
-            for rx,ry in r_coords:
-                dists=np.array([haversine(rx,ry,wx,wy)*ROAD_FACTOR for wx,wy in wh_coords])
-                trans_cost+=(dists*np.array(demand_per_wh)*share*transfer_rate_mile).sum()
+            dists=_dist_matrix(r_coords[:,0],r_coords[:,1],centers)
+            trans_cost=(dists*np.array(demand_per_wh)*share*transfer_rate_mile).sum()
 
         total=out_cost+wh_cost+in_cost+trans_cost
         if best is None or total<best["total_cost"]:
@@ -1,5 +1,9 @@
 
 import math, numpy as np
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; haversine_matrix falls back to NumPy
+    njit = None
 EARTH_RADIUS_MI = 3958.8
 
 def haversine(lon1, lat1, lon2, lat2):
@@ -15,5 +19,35 @@ def haversine(lon1, lat1, lon2, lat2):
     a = np.sin(dlat/2.0)**2 + np.cos(lat1)*np.cos(lat2)*np.sin(dlon/2.0)**2
     return EARTH_RADIUS_MI * 2.0 * np.arcsin(np.sqrt(a))
 
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _haversine_matrix_nb(olon, olat, dlon, dlat):
+        m, n = olon.size, dlon.size
+        out = np.empty((m, n))
+        for i in prange(m):
+            lon1 = math.radians(olon[i])
+            lat1 = math.radians(olat[i])
+            cos1 = math.cos(lat1)
+            for j in range(n):
+                lat2 = math.radians(dlat[j])
+                a = (math.sin((lat2 - lat1) / 2.0)**2
+                     + cos1 * math.cos(lat2)
+                     * math.sin((math.radians(dlon[j]) - lon1) / 2.0)**2)
+                out[i, j] = EARTH_RADIUS_MI * 2.0 * math.asin(math.sqrt(a))
+        return out
+else:
+    _haversine_matrix_nb = None
+
+def haversine_matrix(olon, olat, dlon, dlat):
+    """Great‑circle miles from M origins (rows) to N destinations (cols).
+
+    Uses a compiled Numba kernel when numba is installed, else broadcasting.
+    """
+    olon, olat, dlon, dlat = (np.ascontiguousarray(np.ravel(x), dtype=float)
+                              for x in (olon, olat, dlon, dlat))
+    if _haversine_matrix_nb is not None:
+        return _haversine_matrix_nb(olon, olat, dlon, dlat)
+    return haversine(olon[:, None], olat[:, None], dlon[None, :], dlat[None, :])
+
 def warehousing_cost(demand_lbs, sqft_per_lb, cost_per_sqft, fixed_cost):
     return fixed_cost + demand_lbs * sqft_per_lb * cost_per_sqft